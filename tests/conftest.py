@@ -0,0 +1,84 @@
+"""Shared fixtures for the VegeHub tests."""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aioresponses import aioresponses
+
+FAKE_HUB_HOST = "127.0.0.1"
+
+
+@dataclass
+class FakeHub:
+    """Canned responses and recorded requests for the in-process fake hub."""
+
+    address: str
+    responses: dict[str, tuple[int, Any]] = field(default_factory=dict)
+    requests: list[tuple[str, bytes, Any]] = field(default_factory=list)
+    latency: float = 0.0
+
+    def reply(self, path: str, payload: Any = None, status: int = 200) -> None:
+        """Answer requests to path (e.g. "/api/info/get") with payload."""
+        self.responses[path] = (status, payload)
+
+    def reset(self) -> None:
+        """Forget the responses, requests and latency set by a test."""
+        self.responses.clear()
+        self.requests.clear()
+        self.latency = 0.0
+
+
+@pytest.fixture(name="mocked", scope="session")
+def fixture_mocked():
+    """Patch aiohttp once for the whole session instead of once per test."""
+    # Requests to the fake hub server go out over the real loopback socket
+    with aioresponses(passthrough=[f"http://{FAKE_HUB_HOST}"]) as mocked:
+        yield mocked
+
+
+@pytest.fixture(autouse=True)
+def fixture_reset_mocked(mocked):
+    """Drop the routes and recorded requests registered by each test."""
+    yield
+    mocked.clear()
+    mocked.requests.clear()
+
+
+@pytest_asyncio.fixture(name="fake_hub_server", scope="session")
+async def fixture_fake_hub_server():
+    """Serve the hub API from an aiohttp app on an ephemeral loopback port."""
+    state = FakeHub(address="")
+
+    async def handle(request: web.Request) -> web.Response:
+        # Record which connection the request came in on, so tests can see
+        # whether the client reused a pooled connection
+        peer = (
+            request.transport.get_extra_info("peername") if request.transport else None
+        )
+        state.requests.append((request.path, await request.read(), peer))
+        if state.latency:
+            await asyncio.sleep(state.latency)
+        status, payload = state.responses.get(request.path, (404, None))
+        return web.json_response(payload, status=status)
+
+    app = web.Application()
+    app.router.add_route("*", "/api/{endpoint:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, FAKE_HUB_HOST, 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    state.address = f"{FAKE_HUB_HOST}:{port}"
+    yield state
+    await runner.cleanup()
+
+
+@pytest.fixture(name="fake_hub")
+def fixture_fake_hub(fake_hub_server):
+    """Give each test the fake hub server with no responses registered."""
+    fake_hub_server.reset()
+    return fake_hub_server
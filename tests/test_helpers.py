@@ -7,6 +7,7 @@ from vegehub.helpers import (
     update_data_to_ha_dict,
     update_data_to_latest_dict,
     vh400_transform,
+    vh400_transform_many,
 )
 
 UPDATE_DATA = {
@@ -71,6 +72,8 @@ UPDATE_DATA_ALL_ACTUATORS = {
         (3, 100.0),  # Fifth segment boundary
         (3.5, 100.0),  # Beyond the last segment
         ("1.5", 24.615),  # String input, valid conversion
+        (float("nan"), 100.0),  # NaN, reported as the top of the curve
+        ("nan", 100.0),  # NaN as a string
         ("invalid", None),  # Invalid string input
         (None, None),  # None input
         ([], None),  # Invalid type (list)
@@ -92,6 +95,50 @@ def test_vh400_transform_negative_input():
     assert vh400_transform(-1) == 0.0
 
 
+# Numeric inputs and the expected VH400 output, checked in one batch
+VH400_INPUTS = [
+    0.005,  # Below noise threshold
+    0.011,  # Just above the noise threshold
+    1,  # Within the first segment
+    1.1,  # First segment boundary
+    1.2,  # Within the second segment
+    1.3,  # Second segment boundary
+    1.5,  # Within the third segment
+    1.82,  # Third segment boundary
+    2,  # Within the fourth segment
+    2.2,  # Fourth segment boundary
+    2.6,  # Within the fifth segment
+    3,  # Fifth segment boundary
+    3.5,  # Beyond the last segment
+    "1.5",  # String input, valid conversion
+    float("nan"),  # NaN, reported as the top of the curve
+]
+VH400_EXPECTED = [
+    0.0,
+    0.09999,
+    9.09090909091,
+    10.0,
+    12.5,
+    15.0,
+    24.615,
+    40.0,
+    44.736,
+    50.0,
+    75.0,
+    100.0,
+    100.0,
+    24.615,
+    100.0,
+]
+
+
+def test_vh400_transform_many():
+    """Test numeric values along the whole curve in a single batch."""
+    result = vh400_transform_many([*VH400_INPUTS, "invalid"])
+    assert pytest.approx(result[:-1], rel=1e-4) == VH400_EXPECTED
+    assert result[-1] is None
+
+
 @pytest.mark.parametrize(
     "input_value, expected_output",
     [
@@ -143,6 +190,39 @@ def test_update_data_converter():
     assert data["7c9ebd4b49d8_5"] == 9.314800262
 
 
+def test_update_data_converter_odd_slots():
+    """Test non-int slots are lowercased in the key like the rest of it."""
+    data = update_data_to_latest_dict(
+        {
+            "mac": "7C9EBD4B49D8",
+            "sensors": [
+                {"samples": [{"v": 1.0}]},
+                {"slot": "A", "samples": [{"v": 2.0}]},
+                {"slot": True, "samples": [{"v": 3.0}]},
+            ],
+        }
+    )
+    assert data == {
+        "7c9ebd4b49d8_none": 1.0,
+        "7c9ebd4b49d8_a": 2.0,
+        "7c9ebd4b49d8_true": 3.0,
+    }
+
+
+def test_update_data_converter_non_str_mac():
+    """Test a MAC that is not a string still produces keys."""
+    data = update_data_to_latest_dict(
+        {"mac": 123456, "sensors": [{"slot": 1, "samples": [{"v": 1.0}]}]}
+    )
+    assert data == {"123456_1": 1.0}
+
+
+def test_update_data_converter_bad_data():
+    """Test the update data converter ignores data without sensors or a MAC."""
+    assert not update_data_to_latest_dict({"sensors": []})
+    assert not update_data_to_latest_dict({"mac": "7C9EBD4B49D8"})
+
+
 def test_update_ha_data_converter():
     """Test the home assistant update data converter."""
     data = update_data_to_ha_dict(UPDATE_DATA, 4, 2, False)
@@ -193,3 +273,15 @@ def test_update_ha_data_converter_all_actuators():
     assert data["actuator_1"] == 0
     assert data["actuator_3"] == 0
     assert "actuator_4" not in data
+
+
+def test_update_ha_data_converter_many_slots():
+    """Test the update data converter beyond the precomputed key tables."""
+    sensors = [{"slot": slot, "samples": [{"v": slot}]} for slot in range(1, 81)]
+    data = update_data_to_ha_dict(
+        {"mac": "7C9EBD4B49D8", "sensors": sensors}, 40, 40, True
+    )
+    assert data["analog_0"] == 1
+    assert data["analog_39"] == 40
+    assert data["actuator_0"] == 41
+    assert data["actuator_39"] == 80
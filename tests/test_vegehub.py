@@ -2,14 +2,17 @@
 
 # pylint: disable=protected-access
 
+import asyncio
+import json
+from types import MappingProxyType
 from unittest.mock import AsyncMock, Mock, patch
 
+import aiohttp
 import pytest
 import pytest_asyncio
 from aiohttp.client_exceptions import ClientConnectorError
-from aioresponses import aioresponses
 
-from vegehub.vegehub import VegeHub
+from vegehub.vegehub import VegeHub, _json_dumps
 
 IP_ADDR = "192.168.0.100"
 UNIQUE_ID = "aabbccddeeff"
@@ -71,360 +74,422 @@ WIFI_INFO_PAYLOAD = {
     }
 }
 
+# Endpoints already configured on a new-firmware hub, read-only at every level
+EXISTING_ENDPOINTS = (
+    MappingProxyType(
+        {
+            "id": 1,
+            "name": "VegeCloud",
+            "type": "vegecloud",
+            "enabled": True,
+            "connection_method": "wifi",
+            "config": MappingProxyType(
+                {
+                    "api_key": "key1",
+                    "route_key": "route1",
+                    "server_url": "https://api.vegecloud.com/v2",
+                }
+            ),
+        }
+    ),
+    MappingProxyType(
+        {
+            "id": 2,
+            "name": "CustomServer",
+            "type": "custom",
+            "enabled": False,
+            "connection_method": "wifi",
+            "config": MappingProxyType(
+                {
+                    "api_key": "key2",
+                    "data_format": "json",
+                    "url": "https://custom.server.com",
+                }
+            ),
+        }
+    ),
+)
+
+
+def copy_existing_endpoints() -> list[dict]:
+    """Return a mutable copy of EXISTING_ENDPOINTS, nested config included."""
+    return [{**e, "config": dict(e["config"])} for e in EXISTING_ENDPOINTS]
 
-@pytest_asyncio.fixture(name="basic_hub")
+
+@pytest_asyncio.fixture(name="basic_hub", scope="session")
 async def fixture_basic_hub():
-    """Fixture for creating a VegeHub instance."""
-    hub = VegeHub(ip_address=IP_ADDR, unique_id=UNIQUE_ID)
+    """Fixture for creating one VegeHub instance shared by every test."""
+    hub = VegeHub(ip_address=IP_ADDR, unique_id=UNIQUE_ID, retry_base=0)
     yield hub
     # Close the session if it was created
     await hub.close()
 
 
+@pytest.fixture(name="reset_hub", autouse=True)
+def fixture_reset_hub(basic_hub):
+    """Give each test the shared hub in its freshly constructed state."""
+    basic_hub._mac_address = ""
+    basic_hub._unique_id = UNIQUE_ID
+    basic_hub._info = None
+    basic_hub.entities.clear()
+
+
 @pytest.mark.asyncio
-async def test_retrieve_mac_address_success(basic_hub):
+async def test_retrieve_mac_address_success(basic_hub, mocked):
     """Test retrieve_mac_address method retrieves and sets the MAC address successfully."""
-    with aioresponses() as mocked:
-        mocked.post(f"http://{IP_ADDR}/api/info/get", payload=WIFI_INFO_PAYLOAD)
-        assert IP_ADDR == basic_hub.ip_address
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload=WIFI_INFO_PAYLOAD)
+    assert IP_ADDR == basic_hub.ip_address
 
-        ret = await basic_hub.retrieve_mac_address()
-        assert ret is True
-        assert basic_hub.mac_address == TEST_MAC_SHORT
-        assert basic_hub.unique_id == UNIQUE_ID
+    ret = await basic_hub.retrieve_mac_address()
+    assert ret is True
+    assert basic_hub.mac_address == TEST_MAC_SHORT
+    assert basic_hub.unique_id == UNIQUE_ID
 
 
 @pytest.mark.asyncio
-async def test_retrieve_mac_address_failure_response(basic_hub):
+async def test_retrieve_mac_address_failure_response(basic_hub, mocked):
     """Test retrieve_mac_address method retrieves and sets the MAC address successfully."""
-    with aioresponses() as mocked:
-        mocked.post(
-            f"http://{IP_ADDR}/api/info/get", payload=WIFI_INFO_PAYLOAD, status=400
-        )
-        mocked.post(
-            f"http://{IP_ADDR}/api/info/get", payload=WIFI_INFO_PAYLOAD, status=400
-        )
-        # Note: This mock is repeated twice. aioresponses is supposed to be
-        # able to let you set repeat=2 and then it only repeats that response
-        # twice, but there appears to be a bug that means that if you use any
-        # number of repeats, it will just repeat that response forever. So for
-        # now, we are using two explicit post mocks, and then one that repeats
-        # forever after that.
-        mocked.post(
-            f"http://{IP_ADDR}/api/info/get", payload={}, status=200, repeat=True
-        )
-        with pytest.raises(ConnectionError):
-            await basic_hub.retrieve_mac_address(retries=1)
-        ret = await basic_hub.retrieve_mac_address(retries=5)
-        assert ret is False
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload=WIFI_INFO_PAYLOAD, status=400)
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload=WIFI_INFO_PAYLOAD, status=400)
+    # Note: This mock is repeated twice. aioresponses is supposed to be
+    # able to let you set repeat=2 and then it only repeats that response
+    # twice, but there appears to be a bug that means that if you use any
+    # number of repeats, it will just repeat that response forever. So for
+    # now, we are using two explicit post mocks, and then one that repeats
+    # forever after that.
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload={}, status=200, repeat=True)
+    with pytest.raises(ConnectionError):
+        await basic_hub.retrieve_mac_address(retries=1)
+    ret = await basic_hub.retrieve_mac_address(retries=5)
+    assert ret is False
 
 
 @pytest.mark.asyncio
-async def test_retrieve_mac_address_failure_data(basic_hub):
+async def test_retrieve_mac_address_failure_data(basic_hub, mocked):
     """Test retrieve_mac_address handles failure to retrieve MAC address."""
-    with aioresponses() as mocked:
-        mocked.post(f"http://{IP_ADDR}/api/info/get", payload={"wifi": {}})
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload={"wifi": {}})
 
-        ret = await basic_hub.retrieve_mac_address()
+    ret = await basic_hub.retrieve_mac_address()
 
-        assert ret is False
-        assert basic_hub.mac_address == ""
+    assert ret is False
+    assert basic_hub.mac_address == ""
 
 
 @pytest.mark.asyncio
-async def test_setup_success(basic_hub):
+async def test_retrieve_mac_address_normalizes(basic_hub, mocked):
+    """Test retrieve_mac_address strips separators and uppercases the MAC."""
+    mocked.post(
+        f"http://{IP_ADDR}/api/info/get",
+        payload={"wifi": {"mac_addr": "aa-bb-cc-dd-ee-ff"}},
+    )
+
+    assert await basic_hub.retrieve_mac_address() is True
+    assert basic_hub.mac_address == TEST_MAC_SHORT
+
+
+@pytest.mark.asyncio
+async def test_setup_success(basic_hub, mocked):
     """Test the setup method sends the correct API key and server address."""
-    with aioresponses() as mocked:
-        # Mock _get_device_config
-        mocked.post(
-            f"http://{IP_ADDR}/api/config/get",
-            payload={"hub": {}, "api_key": TEST_API_KEY},
-        )
+    # Mock _get_device_config
+    mocked.post(
+        f"http://{IP_ADDR}/api/config/get",
+        payload={"hub": {}, "api_key": TEST_API_KEY},
+    )
 
-        mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
+    mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
 
-        # Mock _get_device_info
-        mocked.post(f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD)
+    # Mock _get_device_info
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD)
 
-        await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
+    await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
 
-        assert basic_hub.info == HUB_INFO_PAYLOAD["hub"]
-        assert basic_hub.num_actuators == NUM_ACTUATORS
-        assert basic_hub.num_sensors == NUM_CHANNELS
-        assert basic_hub.is_ac == IS_AC
-        assert basic_hub.url == (f"http://{IP_ADDR}")
-        assert basic_hub.sw_version == SW_VER
+    assert basic_hub.info == HUB_INFO_PAYLOAD["hub"]
+    assert basic_hub.num_actuators == NUM_ACTUATORS
+    assert basic_hub.num_sensors == NUM_CHANNELS
+    assert basic_hub.is_ac == IS_AC
+    assert basic_hub.url == (f"http://{IP_ADDR}")
+    assert basic_hub.sw_version == SW_VER
 
 
 @pytest.mark.asyncio
-async def test_setup_failure_config_get(basic_hub):
-    """Test the setup method sends the correct API key and server address."""
-    with aioresponses() as mocked:
-        # Mock _get_device_config
-        mocked.post(
-            f"http://{IP_ADDR}/api/config/get",
-            payload={"hub": {}, "api_key": TEST_API_KEY},
-            status=400,
-        )
-        mocked.post(
-            f"http://{IP_ADDR}/api/config/get",
-            payload={"hub": {}, "api_key": TEST_API_KEY},
-            status=400,
-        )
-        mocked.post(
-            f"http://{IP_ADDR}/api/config/get", payload=None, status=200, repeat=True
-        )
-
-        # Mock _get_device_info
-        mocked.post(
-            f"http://{IP_ADDR}/api/info/get",
-            payload=HUB_INFO_PAYLOAD,
-            status=200,
-            repeat=True,
-        )
+@pytest.mark.parametrize(
+    "flaky_endpoint,expected_ret,expected_info",
+    [
+        ("config/get", False, HUB_INFO_PAYLOAD["hub"]),
+        ("config/set", True, HUB_INFO_PAYLOAD["hub"]),
+        ("info/get", True, None),
+    ],
+    ids=["config_get", "config_set", "no_info"],
+)
+async def test_setup_failure_flaky_endpoint(
+    basic_hub, mocked, flaky_endpoint, expected_ret, expected_info
+):
+    """Test setup when one endpoint fails twice before answering with no body."""
+    responses = {
+        "config/get": {"hub": {}, "api_key": TEST_API_KEY},
+        "config/set": None,
+        "info/get": HUB_INFO_PAYLOAD,
+    }
+    for endpoint, payload in responses.items():
+        url = f"http://{IP_ADDR}/api/{endpoint}"
+        if endpoint == flaky_endpoint:
+            # Two explicit failures, since aioresponses repeats a counted
+            # response forever, then an empty body from then on.
+            mocked.post(url, payload=payload, status=400)
+            mocked.post(url, payload=payload, status=400)
+            payload = None
+        mocked.post(url, payload=payload, status=200, repeat=True)
+
+    with pytest.raises(ConnectionError):
+        await basic_hub.setup(TEST_API_KEY, TEST_SERVER, retries=1)
+    ret = await basic_hub.setup(TEST_API_KEY, TEST_SERVER, retries=3)
 
-        with pytest.raises(ConnectionError):
-            ret = await basic_hub.setup(TEST_API_KEY, TEST_SERVER, retries=1)
-        ret = await basic_hub.setup(TEST_API_KEY, TEST_SERVER, retries=5)
-        assert ret is False
+    assert ret is expected_ret
+    assert basic_hub.info == expected_info
+    if expected_info is None:
+        assert basic_hub.num_actuators is None
+        assert basic_hub.num_sensors is None
+        assert basic_hub.is_ac is None
+        assert basic_hub.sw_version is None
 
 
 @pytest.mark.asyncio
-async def test_setup_failure_config_set(basic_hub):
-    """Test the setup method sends the correct API key and server address."""
-    with aioresponses() as mocked:
-        # Mock _get_device_config
-        mocked.post(
-            f"http://{IP_ADDR}/api/config/get",
-            payload={"hub": {}, "api_key": TEST_API_KEY},
-            status=200,
-            repeat=True,
-        )
-
-        mocked.post(f"http://{IP_ADDR}/api/config/set", status=400)
-        mocked.post(f"http://{IP_ADDR}/api/config/set", status=400)
-        mocked.post(f"http://{IP_ADDR}/api/config/set", status=200, repeat=True)
-
-        # Mock _get_device_info
-        mocked.post(
-            f"http://{IP_ADDR}/api/info/get",
-            payload=HUB_INFO_PAYLOAD,
-            status=200,
-            repeat=True,
-        )
+async def test_setup_config_failure_cancels_info_read(basic_hub):
+    """Test setup stops the info read instead of waiting when the config read fails."""
+    info_cancelled = asyncio.Event()
+
+    async def failing_config():
+        # Yield once so the info read is already in flight
+        await asyncio.sleep(0)
+        raise ConnectionError("config")
+
+    async def hanging_info():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            info_cancelled.set()
+            raise
+
+    with (
+        patch.object(basic_hub, "_get_device_config", new=failing_config),
+        patch.object(basic_hub, "_get_device_info", new=hanging_info),
+    ):
         with pytest.raises(ConnectionError):
-            ret = await basic_hub.setup(TEST_API_KEY, TEST_SERVER, retries=1)
-        ret = await basic_hub.setup(TEST_API_KEY, TEST_SERVER, retries=3)
-        assert ret is True
+            await asyncio.wait_for(basic_hub.setup(TEST_API_KEY, TEST_SERVER), 1)
 
+    assert info_cancelled.is_set()
 
-@pytest.mark.asyncio
-async def test_setup_failure_missing_api_key(basic_hub):
-    """Test the setup method sends the correct API key and server address."""
-    with aioresponses() as mocked:
-        # Mock _get_device_config
-        mocked.post(f"http://{IP_ADDR}/api/config/get", payload={"hub": {}})
 
-        mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
+@pytest.mark.asyncio
+async def test_setup_config_and_info_failure(basic_hub):
+    """Test the info error is chained onto the config error when both reads fail."""
+    info_err = ConnectionError("info")
 
-        # Mock _get_device_info
-        mocked.post(
-            f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD, status=200
-        )
+    async def failing_config():
+        # Yield once so the info read runs and fails first
+        await asyncio.sleep(0)
+        raise ConnectionError("config")
 
-        ret = await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
+    with (
+        patch.object(basic_hub, "_get_device_config", new=failing_config),
+        patch.object(basic_hub, "_get_device_info", side_effect=info_err),
+    ):
+        with pytest.raises(ConnectionError, match="config") as excinfo:
+            await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
 
-        assert ret is False
+    assert excinfo.value.__cause__ is info_err
 
 
 @pytest.mark.asyncio
-async def test_setup_failure_missing_hub(basic_hub):
-    """Test the setup method sends the correct API key and server address."""
-    with aioresponses() as mocked:
-        # Mock _get_device_config
-        mocked.post(
-            f"http://{IP_ADDR}/api/config/get", payload={"api_key": TEST_API_KEY}
-        )
+async def test_setup_config_set_failure_keeps_info(basic_hub, mocked):
+    """Test a successful info read is kept when writing the config fails."""
+    mocked.post(
+        f"http://{IP_ADDR}/api/config/get",
+        payload={"hub": {}, "api_key": TEST_API_KEY},
+    )
+    mocked.post(f"http://{IP_ADDR}/api/config/set", status=400)
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD)
+
+    with pytest.raises(ConnectionError):
+        await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
 
-        mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
+    assert basic_hub.info == HUB_INFO_PAYLOAD["hub"]
 
-        # Mock _get_device_info
-        mocked.post(
-            f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD, status=200
-        )
 
-        ret = await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "config_payload",
+    [{"hub": {}}, {"api_key": TEST_API_KEY}],
+    ids=["missing_api_key", "missing_hub"],
+)
+async def test_setup_failure_incomplete_config(basic_hub, mocked, config_payload):
+    """Test setup fails when the hub's config is missing a required key."""
+    mocked.post(f"http://{IP_ADDR}/api/config/get", payload=config_payload)
+    mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD, status=200)
 
-        assert ret is False
+    ret = await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
+
+    assert ret is False
 
 
 @pytest.mark.asyncio
-async def test_setup_failure_no_info(basic_hub):
-    """Test the setup method sends the correct API key and server address."""
-    with aioresponses() as mocked:
-        # Mock _get_device_config
-        mocked.post(
-            f"http://{IP_ADDR}/api/config/get",
-            payload={"hub": {}, "api_key": TEST_API_KEY},
-            repeat=True,
-        )
-
-        mocked.post(f"http://{IP_ADDR}/api/config/set", status=200, repeat=True)
-
-        # Mock _get_device_info
-        mocked.post(
-            f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD, status=400
-        )
-        mocked.post(
-            f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD, status=400
-        )
-        mocked.post(
-            f"http://{IP_ADDR}/api/info/get", payload=None, status=200, repeat=True
-        )
+async def test_setup_incomplete_config_does_not_back_off(basic_hub, mocked):
+    """Test setup gives up at once when the config can't be modified."""
+    mocked.post(f"http://{IP_ADDR}/api/config/get", payload={"hub": {}}, repeat=True)
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD)
 
-        with pytest.raises(ConnectionError):
-            await basic_hub.setup(TEST_API_KEY, TEST_SERVER, retries=1)
-        await basic_hub.setup(TEST_API_KEY, TEST_SERVER, retries=1)
+    with patch("vegehub.vegehub.asyncio.sleep", new=AsyncMock()) as sleep:
+        ret = await basic_hub.setup(TEST_API_KEY, TEST_SERVER, retries=3)
 
-        assert basic_hub.num_actuators is None
-        assert basic_hub.num_sensors is None
-        assert basic_hub.is_ac is None
-        assert basic_hub.info is None
-        assert basic_hub.sw_version is None
+    assert ret is False
+    sleep.assert_not_awaited()
+    assert not [key for key in mocked.requests if "config/set" in str(key[1])]
 
 
 @pytest.mark.asyncio
-async def test_request_update(basic_hub):
+async def test_set_device_config_none(basic_hub, mocked):
+    """Test _set_device_config sends nothing when there is no config."""
+    assert await basic_hub._set_device_config(None) is False
+    assert not mocked.requests
+
+
+@pytest.mark.asyncio
+async def test_request_update(basic_hub, mocked):
     """Test the _request_update method sends the update request to the device."""
-    with aioresponses() as mocked:
-        mocked.get(f"http://{IP_ADDR}/api/update/send", status=200)
+    mocked.get(f"http://{IP_ADDR}/api/update/send", status=200)
 
-        await basic_hub.request_update()
+    await basic_hub.request_update()
 
 
 @pytest.mark.asyncio
-async def test_request_update_fail(basic_hub):
+async def test_request_update_fail(basic_hub, mocked):
     """Test the _request_update method sends the update request to the device."""
-    with aioresponses() as mocked:
-        mocked.get(f"http://{IP_ADDR}/api/update/send", status=400)
-        with pytest.raises(ConnectionError):
-            await basic_hub.request_update()
+    mocked.get(f"http://{IP_ADDR}/api/update/send", status=400)
+    with pytest.raises(ConnectionError):
+        await basic_hub.request_update()
 
 
 @pytest.mark.asyncio
-async def test_set_actuator(basic_hub):
+async def test_set_actuator(basic_hub, mocked):
     """Test the _request_update method sends the update request to the device."""
-    with aioresponses() as mocked:
-        mocked.post(f"http://{IP_ADDR}/api/actuators/set", status=200)
+    mocked.post(f"http://{IP_ADDR}/api/actuators/set", status=200)
 
-        ret = await basic_hub.set_actuator(0, 0, 60)
+    ret = await basic_hub.set_actuator(0, 0, 60)
 
-        assert ret is True
+    assert ret is True
 
 
 @pytest.mark.asyncio
-async def test_set_actuator_fail(basic_hub):
+async def test_set_actuator_fail(basic_hub, mocked):
     """Test the _request_update method sends the update request to the device."""
-    with aioresponses() as mocked:
-        mocked.post(f"http://{IP_ADDR}/api/actuators/set", status=400)
-        mocked.post(f"http://{IP_ADDR}/api/actuators/set", status=400)
-        mocked.post(f"http://{IP_ADDR}/api/actuators/set", status=200)
-        with pytest.raises(ConnectionError):
-            await basic_hub.set_actuator(0, 0, 60, retries=1)
-        ret = await basic_hub.set_actuator(0, 0, 60, retries=1)
-        assert ret is True
+    mocked.post(f"http://{IP_ADDR}/api/actuators/set", status=400)
+    mocked.post(f"http://{IP_ADDR}/api/actuators/set", status=400)
+    mocked.post(f"http://{IP_ADDR}/api/actuators/set", status=200)
+    with pytest.raises(ConnectionError):
+        await basic_hub.set_actuator(0, 0, 60, retries=1)
+    ret = await basic_hub.set_actuator(0, 0, 60, retries=1)
+    assert ret is True
 
 
 @pytest.mark.asyncio
-async def test_actuator_states(basic_hub):
-    """Test the _request_update method sends the update request to the device."""
-    with aioresponses() as mocked:
-        mocked.get(
-            f"http://{IP_ADDR}/api/actuators/status",
-            status=200,
-            payload=ACTUATOR_INFO_PAYLOAD,
-        )
+async def test_set_actuator_backoff(mocked):
+    """Test retries back off exponentially with jitter, capped at retry_cap."""
+    hub = VegeHub(ip_address=IP_ADDR, retry_base=1.0, retry_cap=3.0)
+    for _ in range(4):
+        mocked.post(f"http://{IP_ADDR}/api/actuators/set", status=400)
+    mocked.post(f"http://{IP_ADDR}/api/actuators/set", status=200)
 
-        ret = await basic_hub.actuator_states()
+    with patch("vegehub.vegehub.asyncio.sleep", new=AsyncMock()) as sleep:
+        ret = await hub.set_actuator(0, 0, 60, retries=4)
+    await hub.close()
 
-        assert ret[0]["state"] == 0
+    assert ret is True
+    delays = [call.args[0] for call in sleep.await_args_list]
+    assert len(delays) == 4
+    assert 1.0 <= delays[0] <= 1.5
+    assert 2.0 <= delays[1] <= 3.0
+    assert delays[2:] == [3.0, 3.0]
 
 
 @pytest.mark.asyncio
-async def test_actuator_states_fail(basic_hub):
+async def test_actuator_states(basic_hub, mocked):
     """Test the _request_update method sends the update request to the device."""
-    with aioresponses() as mocked:
-        mocked.get(f"http://{IP_ADDR}/api/actuators/status", status=400, payload={})
-        mocked.get(f"http://{IP_ADDR}/api/actuators/status", status=400, payload={})
-        mocked.get(f"http://{IP_ADDR}/api/actuators/status", status=200, payload={})
-        with pytest.raises(ConnectionError):
-            await basic_hub.actuator_states(retries=1)
-        with pytest.raises(AttributeError):
-            await basic_hub.actuator_states(retries=1)
+    mocked.get(
+        f"http://{IP_ADDR}/api/actuators/status",
+        status=200,
+        payload=ACTUATOR_INFO_PAYLOAD,
+    )
 
+    ret = await basic_hub.actuator_states()
 
-@pytest.mark.asyncio
-async def test_add_get_entity(basic_hub):
-    """Test retrieve_mac_address method retrieves and sets the MAC address successfully."""
-    basic_hub.entities["entity_id"] = {"dummy": "data"}
-    entity = basic_hub.entities["entity_id"]
-    assert entity.get("dummy") == "data"
+    assert ret[0]["state"] == 0
 
 
 @pytest.mark.asyncio
-async def test_request_update_client_connector_error_fail(basic_hub):
-    """Test the _request_update method handles a connection failure properly."""
-    with patch("aiohttp.ClientSession.get", new_callable=AsyncMock) as mock_get:
-        key = Mock()
-        os_error = OSError("Connection failed")
-        mock_get.side_effect = ClientConnectorError(
-            connection_key=key, os_error=os_error
-        )
-        with pytest.raises(ConnectionError):
-            await basic_hub.request_update()
+async def test_actuator_states_coalesced(basic_hub, mocked):
+    """Test concurrent actuator_states calls share a single request to the hub."""
+    url = f"http://{IP_ADDR}/api/actuators/status"
+    mocked.get(url, status=200, payload=ACTUATOR_INFO_PAYLOAD)
+
+    first, second = await asyncio.gather(
+        basic_hub.actuator_states(), basic_hub.actuator_states()
+    )
+
+    assert first == second == ACTUATOR_INFO_PAYLOAD["actuators"]
+    assert sum(len(calls) for calls in mocked.requests.values()) == 1
+
+    # Once the shared request is done, the next call polls the hub again
+    mocked.get(url, status=400)
+    with pytest.raises(ConnectionError):
+        await basic_hub.actuator_states()
 
 
 @pytest.mark.asyncio
-async def test_request_mac_client_connector_error_fail(basic_hub):
-    """Test the _request_update method handles a connection failure properly."""
-    with patch("aiohttp.ClientSession.get", new_callable=AsyncMock) as mock_get:
-        key = Mock()
-        os_error = OSError("Connection failed")
-        mock_get.side_effect = ClientConnectorError(
-            connection_key=key, os_error=os_error
-        )
-        with pytest.raises(ConnectionError):
-            await basic_hub.retrieve_mac_address()
+async def test_actuator_states_fail(basic_hub, mocked):
+    """Test the _request_update method sends the update request to the device."""
+    mocked.get(f"http://{IP_ADDR}/api/actuators/status", status=400, payload={})
+    mocked.get(f"http://{IP_ADDR}/api/actuators/status", status=400, payload={})
+    mocked.get(f"http://{IP_ADDR}/api/actuators/status", status=200, payload={})
+    with pytest.raises(ConnectionError):
+        await basic_hub.actuator_states(retries=1)
+    with pytest.raises(AttributeError):
+        await basic_hub.actuator_states(retries=1)
 
 
 @pytest.mark.asyncio
-async def test_set_actuator_client_connector_error_fail(basic_hub):
-    """Test the _request_update method handles a connection failure properly."""
-    with patch("aiohttp.ClientSession.get", new_callable=AsyncMock) as mock_get:
-        key = Mock()
-        os_error = OSError("Connection failed")
-        mock_get.side_effect = ClientConnectorError(
-            connection_key=key, os_error=os_error
-        )
-        with pytest.raises(ConnectionError):
-            await basic_hub.set_actuator(0, 0, 60, retries=1)
+async def test_add_get_entity(basic_hub):
+    """Test retrieve_mac_address method retrieves and sets the MAC address successfully."""
+    basic_hub.entities["entity_id"] = {"dummy": "data"}
+    entity = basic_hub.entities["entity_id"]
+    assert entity.get("dummy") == "data"
 
 
 @pytest.mark.asyncio
-async def test_get_actuator_client_connector_error_fail(basic_hub):
-    """Test the _request_update method handles a connection failure properly."""
-    with patch("aiohttp.ClientSession.get", new_callable=AsyncMock) as mock_get:
-        key = Mock()
-        os_error = OSError("Connection failed")
-        mock_get.side_effect = ClientConnectorError(
-            connection_key=key, os_error=os_error
-        )
-        with pytest.raises(ConnectionError):
-            await basic_hub.actuator_states(retries=1)
+@pytest.mark.parametrize(
+    "method,args",
+    [
+        ("request_update", ()),
+        ("retrieve_mac_address", ()),
+        ("set_actuator", (0, 0, 60)),
+        ("actuator_states", ()),
+    ],
+)
+async def test_client_connector_error_fail(basic_hub, monkeypatch, method, args):
+    """Test each request method turns a connection failure into ConnectionError."""
+    error = ClientConnectorError(
+        connection_key=Mock(), os_error=OSError("Connection failed")
+    )
+    session = Mock(get=AsyncMock(side_effect=error), post=AsyncMock(side_effect=error))
+    monkeypatch.setattr(basic_hub, "_session", session)
+
+    with pytest.raises(ConnectionError):
+        await getattr(basic_hub, method)(*args)
+    assert session.get.await_count + session.post.await_count == 1
 
 
 @pytest.mark.asyncio
-async def test_setup_with_endpoints_new_format(basic_hub):
+async def test_setup_with_endpoints_new_format(basic_hub, mocked):
     """Test the setup method with new endpoints format."""
     existing_endpoint = {
         "id": 1,
@@ -439,25 +504,24 @@ async def test_setup_with_endpoints_new_format(basic_hub):
         },
     }
 
-    with aioresponses() as mocked:
-        # Mock _get_device_config with new endpoints format
-        mocked.post(
-            f"http://{IP_ADDR}/api/config/get",
-            payload={
-                "endpoints": [existing_endpoint],
-                "hub": {},
-                "api_key": TEST_API_KEY,
-            },
-        )
+    # Mock _get_device_config with new endpoints format
+    mocked.post(
+        f"http://{IP_ADDR}/api/config/get",
+        payload={
+            "endpoints": [existing_endpoint],
+            "hub": {},
+            "api_key": TEST_API_KEY,
+        },
+    )
 
-        mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
+    mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
 
-        # Mock _get_device_info
-        mocked.post(f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD)
+    # Mock _get_device_info
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD)
 
-        await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
+    await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
 
-        assert basic_hub.info == HUB_INFO_PAYLOAD["hub"]
+    assert basic_hub.info == HUB_INFO_PAYLOAD["hub"]
 
 
 @pytest.mark.asyncio
@@ -500,6 +564,31 @@ async def test_modify_device_config_with_endpoints(basic_hub):
     assert new_endpoint["config"]["url"] == TEST_SERVER
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "existing_endpoints,new_id",
+    [
+        ([{"id": 1}, {"id": 3}], 4),
+        ([{"id": 1}, {"id": None}], 3),
+        ([{"id": "2"}, {"id": 1}], 3),
+        ([{"id": "7"}, {"id": "main"}], 8),
+        ([{"id": True}, {"id": 1}], 3),
+        ([{"id": 1}, "not an endpoint"], 3),
+    ],
+    ids=["gap", "null_id", "string_id", "non_numeric_id", "bool_id", "non_dict"],
+)
+async def test_modify_device_config_next_endpoint_id(
+    basic_hub, existing_endpoints, new_id
+):
+    """Test the new endpoint id never collides with an existing one."""
+    config_data = {"endpoints": existing_endpoints}
+
+    result = basic_hub._modify_device_config(config_data, TEST_API_KEY, TEST_SERVER)
+
+    assert result is config_data
+    assert result["endpoints"][-1]["id"] == new_id
+
+
 @pytest.mark.asyncio
 async def test_modify_device_config_with_empty_endpoints(basic_hub):
     """Test _modify_device_config with empty endpoints array."""
@@ -566,88 +655,33 @@ async def test_modify_device_config_none_input(basic_hub):
 
 
 @pytest.mark.asyncio
-async def test_setup_with_multiple_existing_endpoints(basic_hub):
+async def test_setup_with_multiple_existing_endpoints(basic_hub, mocked):
     """Test setup with multiple existing endpoints in the array."""
-    existing_endpoints = [
-        {
-            "id": 1,
-            "name": "VegeCloud",
-            "type": "vegecloud",
-            "enabled": True,
-            "connection_method": "wifi",
-            "config": {
-                "api_key": "key1",
-                "route_key": "route1",
-                "server_url": "https://api.vegecloud.com/v2",
-            },
-        },
-        {
-            "id": 2,
-            "name": "CustomServer",
-            "type": "custom",
-            "enabled": False,
-            "connection_method": "wifi",
-            "config": {
-                "api_key": "key2",
-                "data_format": "json",
-                "url": "https://custom.server.com",
-            },
+    # Mock _get_device_config with multiple existing endpoints
+    mocked.post(
+        f"http://{IP_ADDR}/api/config/get",
+        payload={
+            "endpoints": copy_existing_endpoints(),
+            "hub": {},
+            "api_key": TEST_API_KEY,
         },
-    ]
-
-    with aioresponses() as mocked:
-        # Mock _get_device_config with multiple existing endpoints
-        mocked.post(
-            f"http://{IP_ADDR}/api/config/get",
-            payload={
-                "endpoints": existing_endpoints.copy(),
-                "hub": {},
-                "api_key": TEST_API_KEY,
-            },
-        )
+    )
 
-        mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
+    mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
 
-        # Mock _get_device_info
-        mocked.post(f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD)
+    # Mock _get_device_info
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD)
 
-        await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
+    await basic_hub.setup(TEST_API_KEY, TEST_SERVER)
 
-        assert basic_hub.info == HUB_INFO_PAYLOAD["hub"]
+    assert basic_hub.info == HUB_INFO_PAYLOAD["hub"]
 
 
 @pytest.mark.asyncio
 async def test_modify_device_config_preserves_existing_endpoints(basic_hub):
     """Test that _modify_device_config preserves all existing endpoints."""
-    existing_endpoints = [
-        {
-            "id": 1,
-            "name": "VegeCloud",
-            "type": "vegecloud",
-            "enabled": True,
-            "connection_method": "wifi",
-            "config": {
-                "api_key": "key1",
-                "route_key": "route1",
-                "server_url": "https://api.vegecloud.com/v2",
-            },
-        },
-        {
-            "id": 2,
-            "name": "CustomServer",
-            "type": "custom",
-            "enabled": False,
-            "connection_method": "wifi",
-            "config": {
-                "api_key": "key2",
-                "data_format": "json",
-                "url": "https://custom.server.com",
-            },
-        },
-    ]
-
     config_data = {
-        "endpoints": existing_endpoints.copy(),
+        "endpoints": copy_existing_endpoints(),
         "hub": {},
         "api_key": "oldkey",
     }
@@ -670,3 +704,134 @@ async def test_modify_device_config_preserves_existing_endpoints(basic_hub):
     assert result["endpoints"][2]["config"]["api_key"] == TEST_API_KEY
     assert result["endpoints"][2]["config"]["data_format"] == "json"
     assert result["endpoints"][2]["config"]["url"] == TEST_SERVER
+
+
+@pytest.mark.asyncio
+async def test_set_device_config_sends_json_body(basic_hub, mocked):
+    """Test _set_device_config sends the config as an encoded JSON body."""
+    config_data = {"hub": {"server_url": TEST_SERVER}, "api_key": TEST_API_KEY}
+
+    mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
+
+    ret = await basic_hub._set_device_config(config_data)
+
+    assert ret is True
+    request = next(iter(mocked.requests.values()))[0]
+    assert request.kwargs["headers"]["Content-Type"] == "application/json"
+    assert json.loads(request.kwargs["data"]) == config_data
+
+
+@pytest.mark.asyncio
+async def test_setup_without_orjson(basic_hub, mocked, monkeypatch):
+    """Test setup end to end with the stdlib json fallback instead of orjson."""
+    monkeypatch.setattr("vegehub.vegehub.orjson", None)
+    mocked.post(
+        f"http://{IP_ADDR}/api/config/get",
+        payload={"hub": {}, "api_key": "oldkey"},
+    )
+    mocked.post(f"http://{IP_ADDR}/api/config/set", status=200)
+    mocked.post(f"http://{IP_ADDR}/api/info/get", payload=HUB_INFO_PAYLOAD)
+
+    assert await basic_hub.setup(TEST_API_KEY, TEST_SERVER) is True
+
+    assert basic_hub.info == HUB_INFO_PAYLOAD["hub"]
+    sent = {
+        url.path: calls[0].kwargs["data"] for (_, url), calls in mocked.requests.items()
+    }
+    assert json.loads(sent["/api/config/get"]) == {
+        "hub": [],
+        "api_key": [],
+        "endpoints": [],
+    }
+    assert json.loads(sent["/api/config/set"])["api_key"] == TEST_API_KEY
+
+
+def test_json_fallback_matches_orjson(monkeypatch):
+    """Test the stdlib json fallback produces the same request body as orjson."""
+    pytest.importorskip("orjson")
+    config_data = {
+        "hub": {"server_url": TEST_SERVER, "server_type": 3, "name": "Serre côté"},
+        "api_key": TEST_API_KEY,
+        "endpoints": [{"id": 1, "enabled": True, "config": {"url": None}}],
+    }
+    orjson_body = _json_dumps(config_data)
+
+    monkeypatch.setattr("vegehub.vegehub.orjson", None)
+
+    assert _json_dumps(config_data) == orjson_body
+
+
+@pytest.mark.asyncio
+async def test_owned_session_is_reused(basic_hub):
+    """Test the hub creates one pooled session and reuses it across calls."""
+    session = await basic_hub._get_session()
+
+    assert await basic_hub._get_session() is session
+    assert session.connector.limit_per_host == 4
+
+    await basic_hub.close()
+    assert session.closed
+
+
+@pytest_asyncio.fixture(name="server_hub")
+async def fixture_server_hub(fake_hub):
+    """Fixture for a VegeHub talking to the in-process fake hub server."""
+    hub = VegeHub(ip_address=fake_hub.address, retry_base=0)
+    yield hub
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_server_setup_success(server_hub, fake_hub):
+    """Test setup end to end against the fake hub server."""
+    fake_hub.reply("/api/config/get", {"hub": {}, "api_key": "oldkey"})
+    fake_hub.reply("/api/config/set")
+    fake_hub.reply("/api/info/get", HUB_INFO_PAYLOAD)
+
+    assert await server_hub.setup(TEST_API_KEY, TEST_SERVER) is True
+
+    assert server_hub.info == HUB_INFO_PAYLOAD["hub"]
+    assert server_hub.mac_address == TEST_MAC_SHORT
+    sent = {path: body for path, body, _ in fake_hub.requests}
+    assert json.loads(sent["/api/config/set"]) == {
+        "hub": {"server_url": TEST_SERVER, "server_type": 3},
+        "api_key": TEST_API_KEY,
+    }
+
+
+@pytest.mark.asyncio
+async def test_server_set_actuator_sends_json_body(server_hub, fake_hub):
+    """Test set_actuator sends the target state as an encoded JSON body."""
+    fake_hub.reply("/api/actuators/set")
+
+    assert await server_hub.set_actuator(1, 2, 60) is True
+
+    [(path, body, _)] = fake_hub.requests
+    assert path == "/api/actuators/set"
+    assert json.loads(body) == {"target": 2, "duration": 60, "state": 1}
+
+
+@pytest.mark.asyncio
+async def test_server_requests_reuse_pooled_connection(server_hub, fake_hub):
+    """Test consecutive requests to the hub reuse one keep-alive connection."""
+    fake_hub.reply("/api/actuators/status", ACTUATOR_INFO_PAYLOAD)
+    fake_hub.reply("/api/update/send")
+
+    await server_hub.actuator_states()
+    await server_hub.request_update()
+    await server_hub.actuator_states()
+
+    assert len({peer for _, _, peer in fake_hub.requests}) == 1
+
+
+@pytest.mark.asyncio
+async def test_server_slow_hub_times_out(fake_hub):
+    """Test a hub slower than the session timeout surfaces as ConnectionError."""
+    fake_hub.reply("/api/actuators/set")
+    fake_hub.latency = 0.2
+
+    timeout = aiohttp.ClientTimeout(total=0.05)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        hub = VegeHub(ip_address=fake_hub.address, session=session, retry_base=0)
+        with pytest.raises(ConnectionError):
+            await hub.set_actuator(1, 0, 60)
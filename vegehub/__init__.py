@@ -5,5 +5,6 @@ from vegehub.helpers import (
     update_data_to_ha_dict,
     update_data_to_latest_dict,
     vh400_transform,
+    vh400_transform_many,
 )
 from vegehub.vegehub import VegeHub
@@ -1,7 +1,57 @@
 """Helper file containing data transformations."""
 
+import math
+from bisect import bisect_left
+from collections.abc import Iterable
+from functools import lru_cache
 from typing import Any
 
+# Breakpoints of the VH400 piecewise linear curve, (volts, percent VWC)
+_VH400_XP = (0.0000, 1.1000, 1.3000, 1.8200, 2.2000, 3.0000)
+_VH400_FP = (0.0000, 10.0000, 15.0000, 40.0000, 50.0000, 100.0000)
+_VH400_SLOPES = tuple(
+    (_VH400_FP[i] - _VH400_FP[i - 1]) / (_VH400_XP[i] - _VH400_XP[i - 1])
+    for i in range(1, len(_VH400_XP))
+)
+# Below 0.01V is just noise and should be reported as 0
+_VH400_NOISE_FLOOR = 0.0100
+
+# Entity keys for every slot a hub can report, so updates don't format strings
+_MAX_SLOTS = 32
+_ANALOG_KEYS = tuple(f"analog_{i}" for i in range(_MAX_SLOTS))
+_ACTUATOR_KEYS = tuple(f"actuator_{i}" for i in range(_MAX_SLOTS))
+
+
+# Stable sensors report the same quantized voltages over and over
+@lru_cache(maxsize=1024)
+def _vh400_kernel(value: float) -> float:
+    """Map a voltage onto the VH400 curve; the input must already be a float."""
+    if value <= _VH400_NOISE_FLOOR:
+        return 0.0
+    # NaN fails every comparison and has always been reported as 100
+    if value > _VH400_XP[-1] or math.isnan(value):
+        # For values greater than 3.0000, return 100.0000
+        return _VH400_FP[-1]
+
+    # Find the segment (xp[i - 1], xp[i]] containing the value and interpolate
+    i = bisect_left(_VH400_XP, value)
+    return _VH400_SLOPES[i - 1] * (value - _VH400_XP[i - 1]) + _VH400_FP[i - 1]
+
+
+def _therm200_kernel(value: float) -> float:
+    """Convert a THERM200 voltage to degrees celsius; the input must be a float."""
+    return (41.6700 * value) - 40.0000
+
+
+def _coerce_float(value: Any) -> float | None:
+    """Convert a str, int or float (or subclass) to float, or None if not possible."""
+    if not isinstance(value, (int, str, float)):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
 
 def vh400_transform(value: int | str | float) -> float | None:
     """Perform a piecewise linear transformation on the input value.
@@ -11,70 +61,49 @@ def vh400_transform(value: int | str | float) -> float | None:
     (2.2000, 50.0000), (3.0000, 100.0000)
     """
 
-    float_value = None
+    # Live sensor readings are plain floats or ints, so check those first
+    value_type = type(value)
+    if value_type is float or value_type is int:
+        return _vh400_kernel(float(value))
 
-    if isinstance(value, float):
-        float_value = value
+    float_value = _coerce_float(value)
+    if float_value is None:
+        return None
 
-    if isinstance(value, (int, str)):
-        try:
-            float_value = float(value)
-        except ValueError:
-            return None
+    return _vh400_kernel(float_value)
 
-    if not isinstance(float_value, float):
-        return None
 
-    ret = 100.0
-
-    if float_value <= 0.0100:
-        # Below 0.01V is just noise and should be reported as 0
-        ret = 0
-    elif float_value <= 1.1000:
-        # Linear interpolation between (0.0000, 0.0000) and (1.1000, 10.0000)
-        ret = (10.0000 - 0.0000) / (1.1000 - 0.0000) * (float_value - 0.0000) + 0.0000
-    elif float_value <= 1.3000:
-        # Linear interpolation between (1.1000, 10.0000) and (1.3000, 15.0000)
-        ret = (15.0000 - 10.0000) / (1.3000 - 1.1000) * (float_value - 1.1000) + 10.0000
-    elif float_value <= 1.8200:
-        # Linear interpolation between (1.3000, 15.0000) and (1.8200, 40.0000)
-        ret = (40.0000 - 15.0000) / (1.8200 - 1.3000) * (float_value - 1.3000) + 15.0000
-    elif float_value <= 2.2000:
-        # Linear interpolation between (1.8200, 40.0000) and (2.2000, 50.0000)
-        ret = (50.0000 - 40.0000) / (2.2000 - 1.8200) * (float_value - 1.8200) + 40.0000
-    elif float_value <= 3.0000:
-        # Linear interpolation between (2.2000, 50.0000) and (3.0000, 100.0000)
-        ret = (100.0000 - 50.0000) / (3.0000 - 2.2000) * (
-            float_value - 2.2000
-        ) + 50.0000
-
-    # For values greater than 3.0000, return 100.0000
-    return ret
+def vh400_transform_many(values: Iterable[int | str | float]) -> list[float | None]:
+    """Apply vh400_transform to a batch of values, such as all samples in an update."""
+    return [vh400_transform(value) for value in values]
 
 
 def therm200_transform(value: int | str | float) -> float | None:
     """Transform to change voltage into degrees celsius."""
-    if not isinstance(value, (int, str, float)):
-        return None
-    try:
-        float_value = float(value)
-    except ValueError:
+    value_type = type(value)
+    if value_type is float or value_type is int:
+        return _therm200_kernel(float(value))
+
+    float_value = _coerce_float(value)
+    if float_value is None:
         return None
 
-    return (41.6700 * float_value) - 40.0000
+    return _therm200_kernel(float_value)
 
 
 def update_data_to_latest_dict(data: dict[str, Any]) -> dict[str, Any]:
     """Accepts raw update data and returns a dict of the latest values of each sensor."""
+    if not ("sensors" in data and "mac" in data):
+        return {}
+    # Lowercase the MAC once instead of every generated key
+    mac_lower = str(data["mac"]).lower()
     sensor_data = {}
-    # Process sensor data
-    if "sensors" in data and "mac" in data:
-        for sensor in data["sensors"]:
-            slot = sensor.get("slot")
-            latest_sample = sensor["samples"][-1]
-            value = latest_sample["v"]
-            entity_id = f"{data['mac']}_{slot}".lower()
-            sensor_data[entity_id] = value
+    for sensor in data["sensors"]:
+        slot = sensor.get("slot")
+        # Int slots have nothing to lowercase; bool is excluded so True stays "true"
+        # pylint: disable-next=unidiomatic-typecheck
+        slot_key = slot if type(slot) is int else str(slot).lower()
+        sensor_data[f"{mac_lower}_{slot_key}"] = sensor["samples"][-1]["v"]
     return sensor_data
 
 
@@ -89,6 +118,22 @@ def update_data_to_ha_dict(
     if not ("sensors" in data and "mac" in data):
         return {}
 
+    # Slot layout: sensors first, then battery (DC hubs only), then actuators.
+    # The boundaries are the same for every slot, so work them out once.
+    battery_slot = None if is_ac else num_sensors + 1
+    actuator_offset = num_sensors + (0 if is_ac else 1)
+    actuator_end = actuator_offset + num_actuators
+    analog_keys = (
+        _ANALOG_KEYS
+        if num_sensors <= _MAX_SLOTS
+        else tuple(f"analog_{i}" for i in range(num_sensors))
+    )
+    actuator_keys = (
+        _ACTUATOR_KEYS
+        if num_actuators <= _MAX_SLOTS
+        else tuple(f"actuator_{i}" for i in range(num_actuators))
+    )
+
     result = {}
     slots = sorted(data["sensors"], key=lambda x: x.get("slot", 0))
 
@@ -100,14 +145,10 @@ def update_data_to_ha_dict(
         value = samples[-1].get("v", 0)
         # Determine what this slot represents
         if 1 <= slot <= num_sensors:
-            result[f"analog_{slot - 1}"] = value
-        elif not is_ac and slot == num_sensors + 1:
+            result[analog_keys[slot - 1]] = value
+        elif slot == battery_slot:
             result["battery"] = value
-        else:
-            # Actuator slots come after sensors (+1 for battery if present)
-            actuator_offset = num_sensors + (0 if is_ac else 1)
-            if actuator_offset < slot <= actuator_offset + num_actuators:
-                actuator_index = slot - actuator_offset - 1
-                result[f"actuator_{actuator_index}"] = value
+        elif actuator_offset < slot <= actuator_end:
+            result[actuator_keys[slot - actuator_offset - 1]] = value
 
     return result
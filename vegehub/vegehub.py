@@ -1,17 +1,93 @@
 """VegeHub API access library."""
 
+import asyncio
+import json
 import logging
-from typing import Any
+import random
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
 
 import aiohttp
 
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
 _LOGGER = logging.getLogger(__name__)
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Hub API paths, keyed by the name each request method looks them up by
+_ENDPOINTS = {
+    "info_get": "info/get",
+    "config_get": "config/get",
+    "config_set": "config/set",
+    "update_send": "update/send",
+    "actuators_set": "actuators/set",
+    "actuators_status": "actuators/status",
+}
+
+# Drops the separators from "AA:BB:CC:DD:EE:FF" or "AA-BB-CC-DD-EE-FF"
+_MAC_SEPARATORS = str.maketrans("", "", ":-")
+
+# Static part of the endpoint added to new-firmware hubs; setup fills in the
+# id, API key and server URL
+_HA_ENDPOINT_TEMPLATE: dict[str, Any] = {
+    "name": "HomeAssistant",
+    "type": "custom",
+    "enabled": True,
+    "connection_method": "wifi",
+    "config": {"data_format": "json"},
+}
+
+# Retry delays grow as base * 2**attempt, stretched by up to this fraction
+_RETRY_JITTER = 0.5
+
+_T = TypeVar("_T")
+
+
+def _normalize_mac(mac: str) -> str:
+    """Strip the separators from a MAC address and uppercase it."""
+    return mac.translate(_MAC_SEPARATORS).upper()
+
+
+def _json_dumps(data: Any) -> bytes:
+    """Serialize data to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)  # pylint: disable=no-member
+    # Match orjson's compact UTF-8 output so both backends send identical bytes
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _json_loads(data: str | bytes) -> Any:
+    """Parse JSON data, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)  # pylint: disable=no-member
+    return json.loads(data)
+
+
+def _next_endpoint_id(endpoints: list) -> int:
+    """Return an endpoint id that no existing endpoint uses."""
+    highest = 0
+    for endpoint in endpoints:
+        endpoint_id = endpoint.get("id") if isinstance(endpoint, dict) else None
+        if isinstance(endpoint_id, str):
+            try:
+                endpoint_id = int(endpoint_id)
+            except ValueError:
+                continue
+        # bool is an int subclass, but True is not a real endpoint id
+        if isinstance(endpoint_id, int) and not isinstance(endpoint_id, bool):
+            highest = max(highest, endpoint_id)
+    # Endpoints with unusable ids still count, so never go below the count
+    return max(len(endpoints), highest) + 1
+
 
 class VegeHub:
     """Vegehub class will contain all properties and methods necessary for contacting the Hub."""
 
-    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-arguments,too-many-instance-attributes
     def __init__(
         self,
         ip_address: str,
@@ -20,14 +96,23 @@ class VegeHub:
         info: dict[Any, Any] | None = None,
         *,
         session: aiohttp.ClientSession | None = None,
+        retry_base: float = 1.0,
+        retry_cap: float = 30.0,
     ) -> None:
         self._ip_address: str = ip_address
+        # The address never changes, so build every request URL up front
+        self._urls: dict[str, str] = {
+            name: f"http://{ip_address}/api/{path}" for name, path in _ENDPOINTS.items()
+        }
         self._mac_address: str = mac_address
         self._unique_id: str = unique_id
         self._info = info
         self.entities: dict[Any, Any] = {}
         self._session: aiohttp.ClientSession | None = session
         self._owns_session: bool = False
+        self._retry_base = retry_base
+        self._retry_cap = retry_cap
+        self._actuator_info_task: asyncio.Task[list] | None = None
 
     @property
     def ip_address(self) -> str:
@@ -88,54 +173,53 @@ class VegeHub:
 
     async def retrieve_mac_address(self, retries: int = 0) -> bool:
         """Start the process of retrieving the MAC address from the Hub."""
-        ret = False
-        while True:
-            try:
-                ret = await self._get_device_mac()
-            except (ConnectionError, TimeoutError):
-                if retries <= 0:
-                    raise
-                retries -= 1
-                continue
-
-            if ret:
-                break
-
-            if retries <= 0:
-                break
-            retries -= 1
-        return ret
+        return await self._with_retry(self._get_device_mac, retries)
 
     async def set_actuator(
         self, state: int, slot: int, duration: int, retries: int = 0
     ) -> bool:
         """Set the target actuator to the target state for the intended duration."""
-        while True:
-            try:
-                await self._set_actuator(state, slot, duration)
-            except (ConnectionError, TimeoutError):
-                if retries <= 0:
-                    raise
-                retries -= 1
-                continue
-
-            break  # If we reach this point without an exception, it has succeeded
+        await self._with_retry(
+            lambda: self._set_actuator(state, slot, duration),
+            retries,
+            retry_falsy=False,
+        )
         return True
 
     async def actuator_states(self, retries: int = 0) -> list:
         """Grab the states of all actuators on the Hub and return a list of JSON data on them."""
-        ret = []
+        return await self._with_retry(
+            self._get_actuator_info, retries, retry_falsy=False
+        )
+
+    async def _with_retry(
+        self,
+        func: Callable[[], Awaitable[_T]],
+        retries: int,
+        *,
+        retry_falsy: bool = True,
+    ) -> _T:
+        """Await func(), retrying up to `retries` times with exponential backoff.
+
+        Connection errors and timeouts are retried, and so are falsy results
+        unless retry_falsy is False. Once the retries are used up the last
+        error is raised, or the last result returned.
+        """
+        attempt = 0
         while True:
             try:
-                ret = await self._get_actuator_info()
+                result = await func()
             except (ConnectionError, TimeoutError):
-                if retries <= 0:
+                if attempt >= retries:
                     raise
-                retries -= 1
-                continue
+            else:
+                if result or not retry_falsy or attempt >= retries:
+                    return result
 
-            break  # If we reach this point without an exception, it has succeeded
-        return ret
+            delay = self._retry_base * 2**attempt
+            delay *= 1 + random.random() * _RETRY_JITTER
+            await asyncio.sleep(min(self._retry_cap, delay))
+            attempt += 1
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create a client session.
@@ -143,7 +227,13 @@ class VegeHub:
         Returns the session provided in __init__, or creates a new one if needed.
         """
         if self._session is None:
-            self._session = aiohttp.ClientSession()
+            # A hub is a single host, so keep a few connections alive for
+            # reuse instead of reconnecting for every request. Hubs addressed
+            # by mDNS name also keep their resolved address between requests.
+            connector = aiohttp.TCPConnector(
+                limit_per_host=4, keepalive_timeout=60, ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
             self._owns_session = True
         return self._session
 
@@ -156,7 +246,24 @@ class VegeHub:
 
     async def setup(self, api_key: str, server_address: str, retries: int = 0) -> bool:
         """Set the API key and target server on the Hub."""
-        config_data = await self._get_device_config_with_retries(retries)
+        # The config and info reads are independent, so fetch them together
+        info_task = asyncio.create_task(
+            self._with_retry(self._get_device_info, retries)
+        )
+        try:
+            config_data = await self._get_device_config_with_retries(retries)
+            await asyncio.wait([info_task])
+        except BaseException as err:
+            # Don't sit through the info read's retries when setup already failed
+            info_task.cancel()
+            await asyncio.wait([info_task])
+            if not info_task.cancelled() and info_task.exception() is not None:
+                raise err from info_task.exception()
+            raise
+
+        info_err = info_task.exception()
+        if info_err is None:
+            self._info = info_task.result()
 
         # Modify the config with the new API key and server address
         modified_config = self._modify_device_config(
@@ -164,19 +271,21 @@ class VegeHub:
         )
         ret = await self._set_device_config_with_retries(modified_config, retries)
 
-        if ret is not None:
-            await self._get_device_info_with_retries(retries)
+        if info_err is not None:
+            raise info_err
 
         return ret
 
     async def _get_device_info(self) -> dict | None:
         """Fetch the current configuration from the device."""
-        url = f"http://{self._ip_address}/api/info/get"
+        url = self._urls["info_get"]
 
         payload: dict[Any, Any] = {"hub": [], "wifi": []}
         session = await self._get_session()
         try:
-            response = await session.post(url, json=payload)
+            response = await session.post(
+                url, data=_json_dumps(payload), headers=_JSON_HEADERS
+            )
             if response.status != 200:
                 _LOGGER.error(
                     "Failed to get config from %s: HTTP %s", url, response.status
@@ -184,14 +293,11 @@ class VegeHub:
                 raise ConnectionError
 
             # Parse the response JSON
-            info_data = await response.json()
+            info_data = await response.json(loads=_json_loads)
             if info_data:
                 if "wifi" in info_data and not self._mac_address:
-                    self._mac_address = (
-                        info_data.get("wifi", {})
-                        .get("mac_addr")
-                        .replace(":", "")
-                        .upper()
+                    self._mac_address = _normalize_mac(
+                        info_data.get("wifi", {}).get("mac_addr")
                     )
                 if "hub" in info_data:
                     _LOGGER.info("Received info from %s", self._ip_address)
@@ -203,7 +309,7 @@ class VegeHub:
 
     async def _get_device_config(self) -> dict | None:
         """Fetch the current configuration from the device."""
-        url = f"http://{self._ip_address}/api/config/get"
+        url = self._urls["config_get"]
 
         # Request both old and new config formats
         # Old format: {"hub": [], "api_key": []}
@@ -212,7 +318,9 @@ class VegeHub:
 
         session = await self._get_session()
         try:
-            response = await session.post(url, json=payload)
+            response = await session.post(
+                url, data=_json_dumps(payload), headers=_JSON_HEADERS
+            )
             if response.status != 200:
                 _LOGGER.error(
                     "Failed to get config from %s: HTTP %s", url, response.status
@@ -220,7 +328,7 @@ class VegeHub:
                 raise ConnectionError
 
             # Parse the response JSON
-            return await response.json()
+            return await response.json(loads=_json_loads)
         except (aiohttp.ClientConnectorError, Exception) as err:
             _LOGGER.error("Connection error getting config from %s: %s", url, err)
             raise ConnectionError from err
@@ -240,20 +348,20 @@ class VegeHub:
         if "endpoints" in config_data and isinstance(
             config_data.get("endpoints"), list
         ):
-            # New format: create a new endpoint and add it to the array
+            # New format: create a new endpoint and add it to the array in
+            # place. Ids may have gaps once endpoints are deleted, so take the
+            # next id after the highest one rather than counting endpoints.
+            endpoints = config_data["endpoints"]
             new_endpoint = {
-                "id": len(config_data["endpoints"]) + 1,
-                "name": "HomeAssistant",
-                "type": "custom",
-                "enabled": True,
-                "connection_method": "wifi",
+                "id": _next_endpoint_id(endpoints),
+                **_HA_ENDPOINT_TEMPLATE,
                 "config": {
+                    **_HA_ENDPOINT_TEMPLATE["config"],
                     "api_key": new_key,
-                    "data_format": "json",
                     "url": server_url,
                 },
             }
-            config_data["endpoints"].append(new_endpoint)
+            endpoints.append(new_endpoint)
             return config_data
 
         # Old format: fall back to the previous behavior for older VegeHubs
@@ -276,14 +384,18 @@ class VegeHub:
 
     async def _set_device_config(self, config_data: dict | None) -> bool:
         """Send the modified configuration back to the device."""
-        url = f"http://{self._ip_address}/api/config/set"
+        url = self._urls["config_set"]
 
         if config_data is None:
             return False
 
         session = await self._get_session()
         try:
-            response = await session.post(url, json=config_data)
+            # Send pre-encoded bytes so the (potentially large) config is not
+            # serialized to a str and then encoded again by aiohttp
+            response = await session.post(
+                url, data=_json_dumps(config_data), headers=_JSON_HEADERS
+            )
             if response.status != 200:
                 _LOGGER.error(
                     "Failed to set config at %s: HTTP %s", url, response.status
@@ -296,69 +408,22 @@ class VegeHub:
 
     async def _get_device_config_with_retries(self, retries: int = 0) -> dict | None:
         """Run the _get_device_config function, but retry on failures if retries > 0."""
-        while True:
-            try:
-                # Fetch current config from the device
-                config_data = await self._get_device_config()
-            except (ConnectionError, TimeoutError):
-                if retries <= 0:
-                    raise
-                retries -= 1
-                continue
-
-            if config_data:
-                return config_data
-
-            if retries <= 0:
-                break
-            retries -= 1
-        return None
+        return await self._with_retry(self._get_device_config, retries) or None
 
     async def _set_device_config_with_retries(
         self, modified_config, retries: int = 0
     ) -> bool:
         """Run the _set_device_config function, but retry on failures if retries > 0."""
-        ret = False
-        while True:
-            try:
-                # Send the modified config back to the device
-                ret = await self._set_device_config(modified_config)
-            except (ConnectionError, TimeoutError):
-                if retries <= 0:
-                    raise
-                retries -= 1
-                continue
-
-            if ret:
-                return ret
-
-            if retries <= 0:
-                break
-            retries -= 1
-        return ret
-
-    async def _get_device_info_with_retries(self, retries: int = 0) -> bool:
-        """Run the _get_device_info function, but retry on failures if retries > 0."""
-        while True:
-            try:
-                self._info = await self._get_device_info()
-            except (ConnectionError, TimeoutError):
-                if retries <= 0:
-                    raise
-                retries -= 1
-                continue
-
-            if self._info:
-                return True
-
-            if retries <= 0:
-                break
-            retries -= 1
-        return False
+        if modified_config is None:
+            # Nothing can be sent, and retrying won't change that
+            return False
+        return await self._with_retry(
+            lambda: self._set_device_config(modified_config), retries
+        )
 
     async def _request_update(self) -> bool:
         """Ask the device to send in a full update of data to Home Assistant."""
-        url = f"http://{self._ip_address}/api/update/send"
+        url = self._urls["update_send"]
         session = await self._get_session()
         try:
             response = await session.get(url)
@@ -377,21 +442,23 @@ class VegeHub:
 
     async def _get_device_mac(self) -> bool:
         """Fetch the MAC address by sending a POST request to the device's /api/config_get."""
-        url = f"http://{self._ip_address}/api/info/get"
+        url = self._urls["info_get"]
 
         # Prepare the JSON payload for the POST request
         payload: dict[Any, Any] = {"wifi": []}
         session = await self._get_session()
         # Use aiohttp to send the POST request with the JSON body
         try:
-            response = await session.post(url, json=payload)
+            response = await session.post(
+                url, data=_json_dumps(payload), headers=_JSON_HEADERS
+            )
             if response.status != 200:
                 _LOGGER.error(
                     "Failed to get config from %s: HTTP %s", url, response.status
                 )
                 raise ConnectionError
             # Parse the JSON response
-            config_data = await response.json()
+            config_data = await response.json(loads=_json_loads)
             mac_address = config_data.get("wifi", {}).get("mac_addr")
             if not mac_address:
                 _LOGGER.error(
@@ -400,14 +467,14 @@ class VegeHub:
                 )
                 return False
             _LOGGER.info("%s MAC address: %s", self._ip_address, mac_address)
-            self._mac_address = mac_address.replace(":", "").upper()
+            self._mac_address = _normalize_mac(mac_address)
         except (aiohttp.ClientConnectorError, Exception) as err:
             _LOGGER.error("Connection error getting mac address from %s: %s", url, err)
             raise ConnectionError from err
         return True
 
     async def _set_actuator(self, state: int, slot: int, duration: int) -> bool:
-        url = f"http://{self._ip_address}/api/actuators/set"
+        url = self._urls["actuators_set"]
         _LOGGER.info("Setting actuator %s on %s", slot, self._ip_address)
 
         # Prepare the JSON payload for the POST request
@@ -418,9 +485,11 @@ class VegeHub:
         }
 
         session = await self._get_session()
-        # Use aiohttp to send the POST request with the JSON body
+        # Send the JSON body as pre-encoded bytes, as for config/set
         try:
-            response = await session.post(url, json=payload)
+            response = await session.post(
+                url, data=_json_dumps(payload), headers=_JSON_HEADERS
+            )
             if response.status != 200:
                 _LOGGER.error(
                     "Failed to set actuator state on %s: HTTP %s",
@@ -434,8 +503,28 @@ class VegeHub:
             raise ConnectionError from err
 
     async def _get_actuator_info(self) -> list:
-        """Fetch the current status of the actuators."""
-        url = f"http://{self._ip_address}/api/actuators/status"
+        """Fetch the current status of the actuators.
+
+        Concurrent callers share a single in-flight request rather than each
+        polling the hub, and all of them receive its result or error.
+        """
+        task = self._actuator_info_task
+        if task is None:
+            task = asyncio.create_task(self._fetch_actuator_info())
+            task.add_done_callback(self._actuator_info_done)
+            self._actuator_info_task = task
+        # Shield the shared request so one caller being cancelled doesn't
+        # cancel it for the others
+        return await asyncio.shield(task)
+
+    def _actuator_info_done(self, task: asyncio.Task[list]) -> None:
+        """Let the next actuator status call start a fresh request."""
+        if self._actuator_info_task is task:
+            self._actuator_info_task = None
+
+    async def _fetch_actuator_info(self) -> list:
+        """Request the current status of the actuators from the hub."""
+        url = self._urls["actuators_status"]
         _LOGGER.info("Retrieving actuator status from %s", self._ip_address)
         session = await self._get_session()
         # Use aiohttp to send the POST request with the JSON body
@@ -448,7 +537,7 @@ class VegeHub:
                 raise ConnectionError
 
             # Parse the JSON response
-            config_data = await response.json()
+            config_data = await response.json(loads=_json_loads)
             actuators = config_data.get("actuators", [])
             if not actuators:
                 _LOGGER.error(